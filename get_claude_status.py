@@ -6,7 +6,11 @@ Creates a temporary tab, runs claude, sends /status, captures output,
 parses credit percentages, and outputs JSON.
 
 Usage:
-    python3 get_claude_status.py
+    python3 get_claude_status.py            # one-shot: spawn a tab, report, close it
+    python3 get_claude_status.py --daemon   # keep a claude tab alive and serve requests
+
+When a daemon is running, one-shot invocations ask it over a unix socket
+instead of spawning their own tab, skipping the claude startup wait.
 
 Output (JSON to stdout):
     {"session_left": 75, "weekly_all_left": 89, ...}
@@ -23,7 +27,6 @@ import re
 import sys
 import os
 import tempfile
-from datetime import datetime, timedelta
 
 # Debug mode - set RCLAUDE_DEBUG=1 to enable debug output
 DEBUG_MODE = os.environ.get('RCLAUDE_DEBUG', '').lower() in ('1', 'true', 'yes')
@@ -36,6 +39,25 @@ if not os.environ.get('ITERM_SESSION_ID'):
     }))
     sys.exit(0)
 
+# Shared helpers live next to this script; both must be installed together
+try:
+    from rcodegen_common import daemon_socket, exit_with_daemon_status, \
+        get_screen_text, serve_status, strip_ansi
+except ImportError:
+    print(json.dumps({
+        "error": "missing_rcodegen_common",
+        "message": "rcodegen_common.py not found. Install it next to this script."
+    }))
+    sys.exit(0)
+
+# Status daemon socket - `--daemon` listens here, one-shot runs try it first
+DAEMON_NAME = "rclaude_status"
+DAEMON_SOCKET = daemon_socket(DAEMON_NAME)
+
+# Prefer a running daemon; fall through to spawning a tab when there is none
+if __name__ == "__main__" and "--daemon" not in sys.argv[1:]:
+    exit_with_daemon_status(DAEMON_NAME)
+
 # Try to import iterm2 package
 try:
     import iterm2
@@ -50,6 +72,31 @@ except ImportError:
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CLAUDE_WRAPPER = os.path.join(SCRIPT_DIR, "claude_wrapper.sh")
 
+# Screen polling - sample every STATUS_POLL_INTERVAL seconds instead of sleeping
+# a fixed amount. An attempt ends when the data parses, when the screen has not
+# changed for STATUS_SETTLE_TIME seconds, or after STATUS_TIMEOUT seconds.
+STATUS_POLL_INTERVAL = 0.05
+STATUS_SETTLE_TIME = 1.0
+STATUS_TIMEOUT = 8
+# The /status dialog itself appears quickly; don't wait long for it
+STATUS_DIALOG_TIMEOUT = 2
+
+# The Usage tab sits just above the last drawn line; skip everything above it
+SCREEN_TAIL_LINES = 80
+
+# Precompiled pattern for parse_status_output. One section is
+# "Current <section> ... NN% used" then, before the next section,
+# "Resets <when>" ("11am" for the session, "Jan 15, 9am" for the week).
+# Matched in place at each "Current " header; gaps are bounded so a screen
+# without the data fails fast instead of rescanning to the end.
+_SECTION_RE = re.compile(
+    r'Current (session|week\s*\(all models\)|week\s*\(Sonnet only\))[^\d]{0,400}(\d+)%\s*used'
+    r'(?:(?:(?!Current ).){0,400}?Resets\s+((?:[A-Za-z]+\s+\d+,?\s+)?\d{1,2}(?:am|pm)))?',
+    re.IGNORECASE | re.DOTALL)
+_SECTION_SPAN = 900
+# Section headers, matched with the same case-insensitivity as _SECTION_RE
+_HEADER_RE = re.compile(r'Current ', re.IGNORECASE)
+
 
 def parse_status_output(text: str) -> dict:
     """Parse /status output to extract credit percentages.
@@ -75,55 +122,128 @@ def parse_status_output(text: str) -> dict:
         "weekly_resets": None
     }
 
-    # Current session: look for "Current session" followed by "XX% used"
-    match = re.search(r'Current session[^\d]*(\d+)%\s*used', text, re.IGNORECASE | re.DOTALL)
-    if match:
-        result["session_left"] = 100 - int(match.group(1))
-
-    # Current week (all models): look for pattern
-    match = re.search(r'Current week\s*\(all models\)[^\d]*(\d+)%\s*used', text, re.IGNORECASE | re.DOTALL)
-    if match:
-        result["weekly_all_left"] = 100 - int(match.group(1))
-
-    # Current week (Sonnet only)
-    match = re.search(r'Current week\s*\(Sonnet only\)[^\d]*(\d+)%\s*used', text, re.IGNORECASE | re.DOTALL)
-    if match:
-        result["weekly_sonnet_left"] = 100 - int(match.group(1))
-
-    # Session reset time - look for "Resets" after "Current session"
-    # Format: "Resets 11am" or "Resets 11pm"
-    session_section = re.search(r'Current session.*?Resets\s+(\d{1,2}(?:am|pm))', text, re.IGNORECASE | re.DOTALL)
-    if session_section:
-        result["session_resets"] = session_section.group(1)
-
-    # Weekly reset - look for "Resets" after "Current week (all models)"
-    # Format: "Resets Jan 15, 9am"
-    weekly_section = re.search(r'Current week\s*\(all models\).*?Resets\s+([A-Za-z]+\s+\d+,?\s+\d{1,2}(?:am|pm))', text, re.IGNORECASE | re.DOTALL)
-    if weekly_section:
-        result["weekly_resets"] = weekly_section.group(1)
+    # Jump between "Current " headers and match each section in place
+    for header in _HEADER_RE.finditer(text):
+        i = header.start()
+        match = _SECTION_RE.match(text, i, i + _SECTION_SPAN)
+        if match:
+            label, used, resets = match.groups()
+            label = label.lower()
+            if label == "session":
+                key, resets_key = "session_left", "session_resets"
+            elif "sonnet" in label:
+                key, resets_key = "weekly_sonnet_left", None
+            else:
+                key, resets_key = "weekly_all_left", "weekly_resets"
+            if result[key] is None:
+                result[key] = 100 - int(used)
+                if resets_key:
+                    result[resets_key] = resets
 
     return result
 
 
-def strip_ansi(text: str) -> str:
-    """Remove ANSI escape codes from text."""
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return ansi_escape.sub('', text)
+async def wait_for_text(session, needle: str, deadline_s: float) -> bool:
+    """Poll the screen until needle appears or the deadline passes."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_s
+    while loop.time() < deadline:
+        await asyncio.sleep(STATUS_POLL_INTERVAL)
+        if needle in strip_ansi(await get_screen_text(session, SCREEN_TAIL_LINES)):
+            return True
+    return False
+
+
+async def wait_for_status(session, deadline_s: float) -> tuple:
+    """Poll until the usage data parses, the screen settles or the deadline passes.
+
+    Returns (status, screen_text, clean_text) from the last sample.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_s
+    settled_at = deadline
+    screen_text = clean_text = ""
+    status = parse_status_output(clean_text)
+    while loop.time() < deadline:
+        await asyncio.sleep(STATUS_POLL_INTERVAL)
+        previous = clean_text
+        screen_text = await get_screen_text(session, SCREEN_TAIL_LINES)
+        clean_text = strip_ansi(screen_text)
+        status = parse_status_output(clean_text)
+        if status["session_left"] is not None or status["weekly_all_left"] is not None:
+            break
+        # Rendered without the data and no longer changing - leave it to the retry
+        if clean_text != previous:
+            settled_at = loop.time() + STATUS_SETTLE_TIME
+        elif loop.time() >= settled_at:
+            break
+    return status, screen_text, clean_text
+
+
+async def try_get_status(session, attempt: int) -> dict:
+    """Send /status and capture result."""
+    # Clear any existing text and send /status command. Keep the writes
+    # separate: claude's input layer turns each read into one input event, so
+    # batched keys would be inserted as text instead of acted on.
+    await session.async_send_text("\x15")  # Ctrl+U to clear line
+    await asyncio.sleep(0.1)
+    await session.async_send_text("/status")
+    await asyncio.sleep(0.1)
+    await session.async_send_text("\r")
+
+    # Wait for /status to load (its header lists the Usage tab)
+    if await wait_for_text(session, "Usage", STATUS_DIALOG_TIMEOUT):
+        # Navigate to Usage tab (Status -> Config -> Usage)
+        # Send Tab twice to move to Usage tab
+        await session.async_send_text("\t")  # Tab to Config
+        await asyncio.sleep(0.3)
+        await session.async_send_text("\t")  # Tab to Usage
+
+        # Poll until the usage data has rendered
+        status, screen_text, clean_text = await wait_for_status(session, STATUS_TIMEOUT)
+    else:
+        # Dialog never opened - don't send Tabs blindly, leave it to the retry
+        screen_text = await get_screen_text(session, SCREEN_TAIL_LINES)
+        clean_text = strip_ansi(screen_text)
+        status = parse_status_output(clean_text)
+
+    # Debug: write raw output to secure temp file (only if debug mode enabled)
+    debug_file = None
+    if DEBUG_MODE:
+        try:
+            fd, debug_file = tempfile.mkstemp(prefix='rclaude_status_', suffix='.txt')
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"=== ATTEMPT {attempt} ===\n")
+                f.write("=== RAW SCREEN ===\n")
+                f.write(screen_text)
+                f.write("\n\n=== CLEANED ===\n")
+                f.write(clean_text)
+        except OSError:
+            # If write fails, continue without debug
+            debug_file = None
 
+    if debug_file:
+        status["_debug"] = debug_file
+    return status
 
-async def get_screen_text(session) -> str:
-    """Get all text currently visible in the session."""
-    contents = await session.async_get_screen_contents()
-    lines = []
-    for i in range(contents.number_of_lines):
-        line = contents.line(i)
-        lines.append(line.string)
-    return '\n'.join(lines)
 
+async def collect_status(session) -> dict:
+    """Run /status in a claude session, retrying once if data is not ready."""
+    # First attempt
+    status = await try_get_status(session, 1)
 
-async def main(connection):
-    app = await iterm2.app.async_get_app(connection)
+    # If data not available, wait and retry once
+    if status["session_left"] is None and status["weekly_all_left"] is None:
+        await asyncio.sleep(3)
+        status = await try_get_status(session, 2)
+    return status
 
+
+def find_window(app) -> tuple:
+    """Find the window and tab containing the session this script runs in.
+
+    Exits with a JSON error on stderr if either cannot be found.
+    """
     # Get the session where this script was launched from
     session_id = os.environ.get('ITERM_SESSION_ID')
     if not session_id:
@@ -140,108 +260,73 @@ async def main(connection):
         print(json.dumps({"error": "Session not found"}), file=sys.stderr)
         sys.exit(1)
 
-    # Find which window contains this session
-    window = None
-    for w in app.terminal_windows:
-        for tab in w.tabs:
-            if current_session in tab.sessions:
-                window = w
-                break
-        if window:
-            break
-
-    if window is None:
+    # Find which window and tab contain this session (the tab lets us switch back)
+    index = {s.session_id: (w, t) for w in app.terminal_windows for t in w.tabs for s in t.sessions}
+    if current_session.session_id not in index:
         print(json.dumps({"error": "Window not found"}), file=sys.stderr)
         sys.exit(1)
 
-    # Find the current tab so we can switch back to it
-    original_tab = None
-    for tab in window.tabs:
-        if current_session in tab.sessions:
-            original_tab = tab
-            break
+    return index[current_session.session_id]
 
-    # Create a new tab running claude via wrapper
+
+async def open_claude_tab(window, original_tab):
+    """Create a tab running claude via wrapper without stealing focus."""
     new_tab = await window.async_create_tab(command=CLAUDE_WRAPPER)
-    if not new_tab:
-        print(json.dumps({"error": "Failed to create tab"}), file=sys.stderr)
-        sys.exit(1)
 
     # Immediately switch back to the original tab to avoid stealing focus
-    if original_tab:
+    if new_tab and original_tab:
         await original_tab.async_select()
+    return new_tab
+
 
-    # Get the session in the new tab
-    new_session = new_tab.current_session
+async def close_claude_tab(tab):
+    """Close a claude tab - send /quit first then close."""
+    try:
+        await tab.current_session.async_send_text("/quit\r")
+        await asyncio.sleep(0.5)
+        await tab.async_close()
+    except Exception as e:
+        print(f"Warning: Failed to close iTerm2 tab: {e}", file=sys.stderr)
+
+
+async def main(connection):
+    app = await iterm2.app.async_get_app(connection)
+    window, original_tab = find_window(app)
+
+    # Create a new tab running claude via wrapper
+    new_tab = await open_claude_tab(window, original_tab)
+    if not new_tab:
+        print(json.dumps({"error": "Failed to create tab"}), file=sys.stderr)
+        sys.exit(1)
 
     try:
         # Wait for claude to start up
         await asyncio.sleep(4)
 
-        async def try_get_status(attempt: int) -> dict:
-            """Send /status and capture result."""
-            # Clear any existing text and send /status command
-            await new_session.async_send_text("\x15")  # Ctrl+U to clear line
-            await asyncio.sleep(0.1)
-            await new_session.async_send_text("/status")
-            await asyncio.sleep(0.1)
-            await new_session.async_send_text("\r")
-
-            # Wait for /status to load
-            await asyncio.sleep(1.5)
-
-            # Navigate to Usage tab (Status -> Config -> Usage)
-            # Send Tab twice to move to Usage tab
-            await new_session.async_send_text("\t")  # Tab to Config
-            await asyncio.sleep(0.3)
-            await new_session.async_send_text("\t")  # Tab to Usage
-            await asyncio.sleep(1)
-
-            # Capture screen contents
-            screen_text = await get_screen_text(new_session)
-            clean_text = strip_ansi(screen_text)
-
-            # Debug: write raw output to secure temp file (only if debug mode enabled)
-            debug_file = None
-            if DEBUG_MODE:
-                try:
-                    fd, debug_file = tempfile.mkstemp(prefix='rclaude_status_', suffix='.txt')
-                    with os.fdopen(fd, 'w') as f:
-                        f.write(f"=== ATTEMPT {attempt} ===\n")
-                        f.write("=== RAW SCREEN ===\n")
-                        f.write(screen_text)
-                        f.write("\n\n=== CLEANED ===\n")
-                        f.write(clean_text)
-                except OSError:
-                    # If write fails, continue without debug
-                    debug_file = None
-
-            # Parse the status
-            status = parse_status_output(clean_text)
-            if debug_file:
-                status["_debug"] = debug_file
-            return status
-
-        # First attempt
-        status = await try_get_status(1)
-
-        # If data not available, wait and retry once
-        if status["session_left"] is None and status["weekly_all_left"] is None:
-            await asyncio.sleep(3)
-            status = await try_get_status(2)
-
         # Output result
+        status = await collect_status(new_tab.current_session)
         print(json.dumps(status))
 
     finally:
-        # Close the tab - send /quit first then close
-        try:
-            await new_session.async_send_text("/quit\r")
-            await asyncio.sleep(0.5)
-            await new_tab.async_close()
-        except Exception as e:
-            print(f"Warning: Failed to close iTerm2 tab: {e}", file=sys.stderr)
+        await close_claude_tab(new_tab)
+
+
+async def serve(connection):
+    """Keep one claude tab alive and answer `run_status` requests on DAEMON_SOCKET."""
+    app = await iterm2.app.async_get_app(connection)
+    window, original_tab = find_window(app)
+
+    async def open_tab():
+        tab = await open_claude_tab(window, original_tab)
+        if not tab:
+            raise RuntimeError("Failed to create tab")
+        # Wait for claude to start up
+        await asyncio.sleep(4)
+        return tab
+
+    # Esc closes the /status dialog after each request
+    await serve_status(DAEMON_SOCKET, app, open_tab, collect_status, close_claude_tab, dismiss="\x1b")
 
 
 if __name__ == "__main__":
-    iterm2.run_until_complete(main)
+    iterm2.run_until_complete(serve if "--daemon" in sys.argv[1:] else main)
@@ -6,13 +6,21 @@ Creates a temporary tab, runs codex, sends /status, captures output,
 parses credit percentages, and outputs JSON.
 
 Usage:
-    python3 get_codex_status.py
+    python3 get_codex_status.py            # one-shot: spawn a tab, report, close it
+    python3 get_codex_status.py --daemon   # keep a codex tab alive and serve requests
+
+When a daemon is running, one-shot invocations ask it over a unix socket
+instead of spawning their own tab, skipping the codex startup wait.
 
 Output (JSON to stdout):
     {"5h_left": 64, "weekly_left": 89, "context_left": 52}
+
+Requirements:
+    - iTerm2 (not macOS Terminal)
+    - iTerm2 Python API enabled (Preferences > General > Magic > Enable Python API)
+    - iterm2 Python package: pip install iterm2
 """
 
-import iterm2
 import asyncio
 import json
 import re
@@ -24,10 +32,83 @@ from datetime import datetime, timedelta
 # Debug mode - set RCODEX_DEBUG=1 to enable debug output
 DEBUG_MODE = os.environ.get('RCODEX_DEBUG', '').lower() in ('1', 'true', 'yes')
 
+# Check for iTerm2 environment before importing iterm2 package
+if not os.environ.get('ITERM_SESSION_ID'):
+    print(json.dumps({
+        "error": "not_iterm2",
+        "message": "Not running in iTerm2. Credit tracking requires iTerm2."
+    }))
+    sys.exit(0)
+
+# Shared helpers live next to this script; both must be installed together
+try:
+    from rcodegen_common import daemon_socket, exit_with_daemon_status, \
+        get_screen_text, serve_status, strip_ansi
+except ImportError:
+    print(json.dumps({
+        "error": "missing_rcodegen_common",
+        "message": "rcodegen_common.py not found. Install it next to this script."
+    }))
+    sys.exit(0)
+
+# Status daemon socket - `--daemon` listens here, one-shot runs try it first
+DAEMON_NAME = "rcodex_status"
+DAEMON_SOCKET = daemon_socket(DAEMON_NAME)
+
+# Prefer a running daemon; fall through to spawning a tab when there is none
+if __name__ == "__main__" and "--daemon" not in sys.argv[1:]:
+    exit_with_daemon_status(DAEMON_NAME)
+
+# Try to import iterm2 package
+try:
+    import iterm2
+except ImportError:
+    print(json.dumps({
+        "error": "no_iterm2_package",
+        "message": "iterm2 Python package not installed. Run: pip install iterm2"
+    }))
+    sys.exit(0)
+
 # Wrapper script that sets up PATH and runs codex
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CODEX_WRAPPER = os.path.join(SCRIPT_DIR, "codex_wrapper.sh")
 
+# Screen polling - sample every STATUS_POLL_INTERVAL seconds instead of sleeping
+# a fixed amount. An attempt ends when the data parses, when the screen has not
+# changed for STATUS_SETTLE_TIME seconds, or after STATUS_TIMEOUT seconds.
+STATUS_POLL_INTERVAL = 0.05
+STATUS_SETTLE_TIME = 1.0
+STATUS_TIMEOUT = 8
+
+# The /status box sits just above the last drawn line; skip everything above it
+SCREEN_TAIL_LINES = 40
+
+# Precompiled patterns for parse_status_output
+# Gaps are bounded so a screen without the data fails fast instead of rescanning to the end
+_FIVE_HOUR_RE = re.compile(r'5h limit:[^\d]{0,200}(\d+)%\s*left[^(]{0,200}\(resets\s+(\d{1,2}:\d{2})\)', re.IGNORECASE)
+_WEEKLY_RE = re.compile(r'Weekly limit:[^\d]{0,200}(\d+)%\s*left[^(]{0,200}\(resets\s+(\d{1,2}:\d{2})\s+on\s+(\d{1,2})\s+(\w+)\)', re.IGNORECASE)
+_CONTEXT_RE = re.compile(r'Context[^\d]{0,200}(\d+)%\s*left', re.IGNORECASE)
+# Each pattern is matched in place at its label, within this many characters
+_LABEL_SPAN = 500
+# Labels are found with the same case-insensitivity as the patterns they anchor
+_FIVE_HOUR_LABEL_RE = re.compile(r'5h limit:', re.IGNORECASE)
+_WEEKLY_LABEL_RE = re.compile(r'Weekly limit:', re.IGNORECASE)
+_CONTEXT_LABEL_RE = re.compile(r'Context', re.IGNORECASE)
+
+# Month abbreviations used in the weekly reset date ("09:00 on 14 Jan")
+_MONTHS = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+           'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12}
+
+
+def _match_at_label(text: str, label_re, pattern):
+    """Match pattern at the first label_re occurrence it fits after, or None."""
+    for label in label_re.finditer(text):
+        i = label.start()
+        match = pattern.match(text, i, i + _LABEL_SPAN)
+        if match:
+            return match
+    return None
+
 
 def parse_status_output(text: str) -> dict:
     """Parse /status output to extract credit percentages and reset times.
@@ -45,11 +126,10 @@ def parse_status_output(text: str) -> dict:
         "weekly_resets": None
     }
 
-    # Pattern: look for "XX% left" after the label
-    # Use DOTALL to handle any characters including unicode progress bars
+    # _match_at_label finds each label case-insensitively and matches "XX% left" in place after it
 
     # 5h limit - find the percentage and reset time
-    match = re.search(r'5h limit:[^\d]*(\d+)%\s*left[^(]*\(resets\s+(\d{1,2}:\d{2})\)', text, re.IGNORECASE | re.DOTALL)
+    match = _match_at_label(text, _FIVE_HOUR_LABEL_RE, _FIVE_HOUR_RE)
     if match:
         result["5h_left"] = int(match.group(1))
         reset_time = match.group(2)
@@ -62,16 +142,14 @@ def parse_status_output(text: str) -> dict:
         result["5h_resets"] = reset_dt.strftime("%Y-%m-%d %H:%M")
 
     # Weekly limit - has full date like "09:00 on 14 Jan"
-    match = re.search(r'Weekly limit:[^\d]*(\d+)%\s*left[^(]*\(resets\s+(\d{1,2}:\d{2})\s+on\s+(\d{1,2})\s+(\w+)\)', text, re.IGNORECASE | re.DOTALL)
+    match = _match_at_label(text, _WEEKLY_LABEL_RE, _WEEKLY_RE)
     if match:
         result["weekly_left"] = int(match.group(1))
         reset_time = match.group(2)
         reset_day = int(match.group(3))
         reset_month_str = match.group(4)
         # Parse month name
-        months = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-                  'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12}
-        reset_month = months.get(reset_month_str.lower()[:3], 1)
+        reset_month = _MONTHS.get(reset_month_str[:3].lower(), 1)
         reset_hour, reset_min = map(int, reset_time.split(':'))
         now = datetime.now()
         reset_year = now.year
@@ -85,32 +163,91 @@ def parse_status_output(text: str) -> dict:
             pass  # Invalid date, skip
 
     # Context window (may or may not have progress bar)
-    match = re.search(r'context[^\d]*(\d+)%\s*left', text, re.IGNORECASE | re.DOTALL)
+    match = _match_at_label(text, _CONTEXT_LABEL_RE, _CONTEXT_RE)
     if match:
         result["context_left"] = int(match.group(1))
 
     return result
 
 
-def strip_ansi(text: str) -> str:
-    """Remove ANSI escape codes from text."""
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return ansi_escape.sub('', text)
+async def wait_for_status(session, deadline_s: float) -> tuple:
+    """Poll until the limits parse, the screen settles or the deadline passes.
 
+    Returns (status, screen_text, clean_text) from the last sample.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_s
+    settled_at = deadline
+    screen_text = clean_text = ""
+    status = parse_status_output(clean_text)
+    while loop.time() < deadline:
+        await asyncio.sleep(STATUS_POLL_INTERVAL)
+        previous = clean_text
+        screen_text = await get_screen_text(session, SCREEN_TAIL_LINES)
+        clean_text = strip_ansi(screen_text)
+        # A reused tab still shows earlier /status boxes; parse only the newest
+        start = clean_text.rfind('/status')
+        status = parse_status_output(clean_text[start:] if start >= 0 else clean_text)
+        if status["5h_left"] is not None:
+            break
+        # Rendered without the data and no longer changing - leave it to the retry
+        if clean_text != previous:
+            settled_at = loop.time() + STATUS_SETTLE_TIME
+        elif loop.time() >= settled_at:
+            break
+    return status, screen_text, clean_text
 
-async def get_screen_text(session) -> str:
-    """Get all text currently visible in the session."""
-    contents = await session.async_get_screen_contents()
-    lines = []
-    for i in range(contents.number_of_lines):
-        line = contents.line(i)
-        lines.append(line.string)
-    return '\n'.join(lines)
 
+async def try_get_status(session, attempt: int) -> dict:
+    """Send /status and capture result."""
+    # Clear any existing text and type /status in one write - codex parses
+    # the Ctrl+U and each character as separate key events
+    await session.async_send_text("\x15/status")
+    # Enter goes separately: inside a fast burst codex treats it as a pasted newline
+    await asyncio.sleep(0.1)
+    await session.async_send_text("\r")
 
-async def main(connection):
-    app = await iterm2.app.async_get_app(connection)
+    # Poll until /status has executed and rendered
+    status, screen_text, clean_text = await wait_for_status(session, STATUS_TIMEOUT)
 
+    # Debug: write raw output to secure temp file (only if debug mode enabled)
+    debug_file = None
+    if DEBUG_MODE:
+        try:
+            # Create secure temp file with restricted permissions (owner read/write only)
+            fd, debug_file = tempfile.mkstemp(prefix='rcodex_status_', suffix='.txt')
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"=== ATTEMPT {attempt} ===\n")
+                f.write("=== RAW SCREEN ===\n")
+                f.write(screen_text)
+                f.write("\n\n=== CLEANED ===\n")
+                f.write(clean_text)
+        except OSError:
+            # If write fails, continue without debug
+            debug_file = None
+
+    if debug_file:
+        status["_debug"] = debug_file
+    return status
+
+
+async def collect_status(session) -> dict:
+    """Run /status in a codex session, retrying once if data is not ready."""
+    # First attempt
+    status = await try_get_status(session, 1)
+
+    # If data not available, wait and retry once
+    if status["5h_left"] is None:
+        await asyncio.sleep(5)
+        status = await try_get_status(session, 2)
+    return status
+
+
+def find_window(app):
+    """Find the window containing the session this script runs in.
+
+    Exits with a JSON error on stderr if it cannot be found.
+    """
     # Get the session where this script was launched from
     session_id = os.environ.get('ITERM_SESSION_ID')
     if not session_id:
@@ -128,92 +265,59 @@ async def main(connection):
         sys.exit(1)
 
     # Find which window contains this session
-    window = None
-    for w in app.terminal_windows:
-        for tab in w.tabs:
-            if current_session in tab.sessions:
-                window = w
-                break
-        if window:
-            break
-
-    if window is None:
+    index = {s.session_id: w for w in app.terminal_windows for t in w.tabs for s in t.sessions}
+    if current_session.session_id not in index:
         print(json.dumps({"error": "Window not found"}), file=sys.stderr)
         sys.exit(1)
 
+    return index[current_session.session_id]
+
+
+async def close_codex_tab(tab):
+    """Close a codex tab."""
+    try:
+        await tab.async_close()
+    except Exception as e:
+        print(f"Warning: Failed to close iTerm2 tab: {e}", file=sys.stderr)
+
+
+async def main(connection):
+    app = await iterm2.app.async_get_app(connection)
+    window = find_window(app)
+
     # Create a new tab running codex via wrapper
     new_tab = await window.async_create_tab(command=CODEX_WRAPPER)
     if not new_tab:
         print(json.dumps({"error": "Failed to create tab"}), file=sys.stderr)
         sys.exit(1)
 
-    # Get the session in the new tab
-    new_session = new_tab.current_session
-
     try:
         # Wait for codex to start up (needs time to load rate limit data)
         await asyncio.sleep(3)
 
-        async def try_get_status(attempt: int) -> dict:
-            """Send /status and capture result."""
-            # Clear any existing text and send /status command
-            await new_session.async_send_text("\x15")  # Ctrl+U to clear line
-            await asyncio.sleep(0.1)
-            await new_session.async_send_text("/status")
-            await asyncio.sleep(0.1)
-            await new_session.async_send_text("\r")
+        # Output result
+        status = await collect_status(new_tab.current_session)
+        print(json.dumps(status))
 
-            # Wait for /status to execute and render
-            await asyncio.sleep(2)
+    finally:
+        await close_codex_tab(new_tab)
 
-            # Capture screen contents
-            screen_text = await get_screen_text(new_session)
-            clean_text = strip_ansi(screen_text)
 
-            # Debug: write raw output to secure temp file (only if debug mode enabled)
-            debug_file = None
-            if DEBUG_MODE:
-                # Create secure temp file with restricted permissions (owner read/write only)
-                fd, debug_file = tempfile.mkstemp(prefix='rcodex_status_', suffix='.txt')
-                try:
-                    with os.fdopen(fd, 'w') as f:
-                        f.write(f"=== ATTEMPT {attempt} ===\n")
-                        f.write("=== RAW SCREEN ===\n")
-                        f.write(screen_text)
-                        f.write("\n\n=== CLEANED ===\n")
-                        f.write(clean_text)
-                except Exception:
-                    # If write fails, close fd and continue without debug
-                    try:
-                        os.close(fd)
-                    except Exception:
-                        pass
-                    debug_file = None
-
-            # Parse the status
-            status = parse_status_output(clean_text)
-            if debug_file:
-                status["_debug"] = debug_file
-            return status
-
-        # First attempt
-        status = await try_get_status(1)
-
-        # If data not available, wait and retry once
-        if status["5h_left"] is None:
-            await asyncio.sleep(5)
-            status = await try_get_status(2)
+async def serve(connection):
+    """Keep one codex tab alive and answer `run_status` requests on DAEMON_SOCKET."""
+    app = await iterm2.app.async_get_app(connection)
+    window = find_window(app)
 
-        # Output result
-        print(json.dumps(status))
+    async def open_tab():
+        tab = await window.async_create_tab(command=CODEX_WRAPPER)
+        if not tab:
+            raise RuntimeError("Failed to create tab")
+        # Wait for codex to start up (needs time to load rate limit data)
+        await asyncio.sleep(3)
+        return tab
 
-    finally:
-        # Close the tab
-        try:
-            await new_tab.async_close()
-        except Exception as e:
-            print(f"Warning: Failed to close iTerm2 tab: {e}", file=sys.stderr)
+    await serve_status(DAEMON_SOCKET, app, open_tab, collect_status, close_codex_tab)
 
 
 if __name__ == "__main__":
-    iterm2.run_until_complete(main)
+    iterm2.run_until_complete(serve if "--daemon" in sys.argv[1:] else main)
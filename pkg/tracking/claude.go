@@ -30,6 +30,7 @@ func GetClaudeStatus() *ClaudeStatus {
 	// Only look for scripts in trusted locations:
 	// 1. Directory where executable lives
 	// 2. ~/.rcodegen/scripts/ (user scripts directory)
+	// rcodegen_common.py must sit next to the script in whichever location is used.
 	// Do NOT search current working directory - could be attacker-controlled
 
 	var statusScript string
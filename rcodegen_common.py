@@ -0,0 +1,223 @@
+"""
+rcodegen_common.py - Helpers shared by the iTerm2 status scripts
+
+Used by get_claude_status.py and get_codex_status.py, which import it from
+their own directory, so it must be installed alongside them.
+"""
+
+import asyncio
+import json
+import os
+import re
+import socket
+import sys
+import tempfile
+
+# Regex ANSI stripping - set RCODEGEN_ANSI_REGEX=1 to bypass the scanner
+ANSI_REGEX_MODE = os.environ.get('RCODEGEN_ANSI_REGEX', '').lower() in ('1', 'true', 'yes')
+
+ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+# Seconds a one-shot run waits for a status daemon to answer
+DAEMON_TIMEOUT = 60
+
+
+def strip_ansi(text: str) -> str:
+    """Remove ANSI escape codes from text.
+
+    Scans once, copying runs of plain text between ESC characters and
+    skipping CSI (ESC [ ... final byte), OSC (ESC ] ... BEL or ESC \\)
+    and two-byte ESC sequences. Set RCODEGEN_ANSI_REGEX=1 to use the
+    regex implementation instead.
+    """
+    if ANSI_REGEX_MODE:
+        return ANSI_RE.sub('', text)
+
+    find = text.find
+    n = len(text)
+    parts = []
+    i = 0
+    while True:
+        esc = find('\x1b', i)
+        if esc < 0:
+            parts.append(text[i:])
+            break
+        parts.append(text[i:esc])
+        k = esc + 1
+        c = text[k] if k < n else ''
+        if c == ']':
+            # OSC: skip the payload up to BEL or ST
+            bel = find('\x07', k)
+            st = find('\x1b\\', k, bel if bel >= 0 else n)
+            if st >= 0:
+                i = st + 2
+            elif bel >= 0:
+                i = bel + 1
+            else:
+                i = k + 1  # Unterminated: drop just the introducer
+        elif c == '[':
+            # CSI: parameter bytes, intermediate bytes, then one final byte
+            k += 1
+            while k < n and '0' <= text[k] <= '?':
+                k += 1
+            while k < n and ' ' <= text[k] <= '/':
+                k += 1
+            if k < n and '@' <= text[k] <= '~':
+                i = k + 1
+            else:
+                parts.append('\x1b')  # Malformed: keep ESC, as the regex does
+                i = esc + 1
+        elif c and ('@' <= c <= 'Z' or '\\' <= c <= '_'):
+            i = k + 1
+        else:
+            parts.append('\x1b')
+            i = esc + 1
+    return ''.join(parts)
+
+
+async def get_screen_text(session, tail: int = 60) -> str:
+    """Get up to `tail` visible lines ending at the last non-blank one.
+
+    The capture is only the visible grid, and a fresh TUI draws from the top
+    with blank rows below, so the window is anchored on the last drawn line
+    rather than the bottom of the screen.
+    """
+    contents = await session.async_get_screen_contents()
+    # ScreenContents has no bulk accessor, so index lines via a cached bound method
+    line = contents.line
+    end = contents.number_of_lines
+    while end > 0 and not line(end - 1).string.strip():
+        end -= 1
+    return '\n'.join([line(i).string for i in range(max(0, end - tail), end)])
+
+
+def daemon_socket(name: str) -> str:
+    """Path of the unix socket the `name` status daemon listens on."""
+    return os.path.join(
+        os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(),
+        f"{name}_{os.getuid()}.sock")
+
+
+def query_daemon(name: str):
+    """Ask the running `name` status daemon for the current status.
+
+    Returns the status dict, or None if no daemon answered successfully.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(DAEMON_TIMEOUT)
+            sock.connect(daemon_socket(name))
+            sock.sendall(b"run_status\n")
+            reply = sock.makefile('rb').readline()
+        status = json.loads(reply)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(status, dict) or "error" in status:
+        return None
+    return status
+
+
+def exit_with_daemon_status(name: str):
+    """Print the running `name` daemon's status and exit; return if none answered."""
+    status = query_daemon(name)
+    if status is not None:
+        print(json.dumps(status))
+        sys.exit(0)
+
+
+async def start_status_server(path: str, handle):
+    """Start a unix socket server on path for the status daemon.
+
+    Clears a socket left behind by a daemon that died. Returns None if
+    another daemon is already answering on path.
+    """
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            return None
+        except OSError:
+            os.unlink(path)
+        finally:
+            probe.close()
+
+    # Bind under a private umask so the socket is never reachable by other users
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        sock.bind(path)
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(old_umask)
+    return await asyncio.start_unix_server(handle, sock=sock)
+
+
+def remove_socket(path: str):
+    """Remove the daemon socket on shutdown, ignoring one that is already gone."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+async def serve_status(path: str, app, open_tab, collect, close_tab, dismiss: str = None):
+    """Keep one tool tab alive and answer `run_status` requests on path.
+
+    open_tab() spawns the tab and waits for the tool to start, collect(session)
+    returns the status dict and close_tab(tab) quits the tool on shutdown.
+    dismiss, if given, is sent after every collect to close the status view.
+    """
+    lock = asyncio.Lock()
+    tab = None
+
+    async def ensure_tab():
+        """Return the live tab, (re)spawning it if it was closed."""
+        nonlocal tab
+        if tab is not None and app.get_session_by_id(tab.current_session.session_id):
+            return tab
+        tab = await open_tab()
+        return tab
+
+    async def handle(reader, writer):
+        try:
+            request = (await reader.readline()).strip()
+            if not request:
+                # Peer hung up without asking, e.g. another daemon probing the socket
+                return
+            if request == b"run_status":
+                try:
+                    # One /status at a time - concurrent keystrokes would interleave
+                    async with lock:
+                        session = (await ensure_tab()).current_session
+                        try:
+                            reply = await collect(session)
+                        finally:
+                            if dismiss:
+                                await session.async_send_text(dismiss)
+                except Exception as e:
+                    reply = {"error": "daemon_failed", "message": str(e)}
+            else:
+                reply = {"error": "unknown_request"}
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            # The client gave up (e.g. after DAEMON_TIMEOUT) before the reply was ready
+            pass
+        finally:
+            writer.close()
+
+    # Refuse to start twice; a socket left behind by a daemon that died is replaced
+    server = await start_status_server(path, handle)
+    if server is None:
+        print(json.dumps({"error": "Daemon already running", "socket": path}), file=sys.stderr)
+        sys.exit(1)
+    print(f"Serving status on {path}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        remove_socket(path)
+        if tab:
+            await close_tab(tab)